@@ -1,6 +1,5 @@
 import med_endian
 from bitarray import bitarray
-import med_endian
 
 '''
 class Bitmap - simple interface for manipulating with bitmaps
@@ -12,7 +12,7 @@ from importlib import import_module
 from queue import Queue
 from threading import Thread, Lock, Event
 from constants import MED_OK, MED_NO
-from framework import exec
+from framework import check_hook
 from mcp import doMedusaCommAuthanswer
 
 
@@ -94,22 +94,13 @@ class Comm(object):
             self.requestsQueue.task_done()
 
     def decide(self, event, subj, obj):
-        def _doCheck(check, kobject):
-            if check is None:
-                print('docheck return True')
-                return True
-
-            print('docheck exec()')
-            return exec(check, kobject)
-
         print('method decide')
 
+        kobjects = {'event': event, 'object': obj, 'subject': subj}
         for hook in self.hook_list.get(event._name, []):
             print('for')
             try:
-                if not _doCheck(hook['event'], event): continue
-                if not _doCheck(hook['object'], obj): continue
-                if not _doCheck(hook['subject'], subj): continue
+                if not check_hook(hook, kobjects): continue
 
                 if obj is None:
                     print('obj None')
@@ -0,0 +1,136 @@
+import types
+import unittest
+from framework import Register, check_hook, exec, compile_cmd, And, Or, Not, Xor, Ge, Le, Lt, Between, Dividable
+
+
+class Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FrameworkUnitTest(unittest.TestCase):
+
+    def test_compare(self):
+        self.assertTrue(exec(5, 5))
+        self.assertFalse(exec(5, 6))
+        self.assertTrue(exec(lambda x: x > 4, 5))
+
+    def test_dict(self):
+        obj = Obj(filename='/', gid=0)
+        self.assertTrue(exec({'filename': '/'}, obj))
+        self.assertTrue(exec({'filename': '/', 'gid': 0}, obj))
+        self.assertFalse(exec({'filename': '/etc'}, obj))
+        self.assertFalse(exec({'filename': '/', 'gid': 1}, obj))
+
+    def test_list(self):
+        self.assertTrue(exec([1, 2, 3], 2))         # OR
+        self.assertFalse(exec([1, 2, 3], 4))
+        self.assertTrue(exec([1, Ge(2)], [1, 3]))   # compare lists
+        self.assertFalse(exec([1, 2], [1, 3]))
+        self.assertFalse(exec([1, 2], [1, 2, 3]))
+
+    def test_compiled(self):
+        check = compile_cmd({'gid': Or(0, And(Ge(100), Lt(200)))})
+        self.assertTrue(check(Obj(gid=0)))
+        self.assertTrue(check(Obj(gid=150)))
+        self.assertFalse(check(Obj(gid=50)))
+        self.assertFalse(check(Obj(gid=200)))
+
+    def test_codegen(self):
+        # checks built only from combinators and literals are compiled into bytecode
+        inner = Xor(Ge(15), Or(12, 13))
+        check = Or(Not(Between(10, 20)), Dividable(30), inner)
+        # generated lazily, nested combinators are inlined by the outer one
+        self.assertIsNone(check._fnc)
+        results = [check(val) for val in range(0, 40)]
+        self.assertIs(types.FunctionType, type(check._fnc))
+        self.assertIsNone(inner.fnc_b._fnc)
+        self.assertEqual([check._check(val) for val in range(0, 40)], results)
+
+        # any other callable falls back to compiled closures
+        check = And(Ge(1), lambda x: x % 2 == 0)
+        self.assertTrue(check(2))
+        self.assertEqual(check._fnc, check._check)
+        self.assertFalse(check(3))
+        self.assertFalse(check(0))
+
+    def test_codegen_subclass(self):
+        # subclass overriding __call__ must be called, not inlined
+        class NotRoot(Ge):
+            __slots__ = ()
+            def __call__(self, val):
+                return val != 0
+        self.assertTrue(NotRoot(5)(3))
+        self.assertTrue(And(NotRoot(5))(3))
+        self.assertTrue(Or(NotRoot(5))(3))
+        self.assertFalse(And(NotRoot(5), Ge(4))(3))
+
+    def test_codegen_deep(self):
+        # too deep for the parser, falls back to closures
+        check = Ge(0)
+        for i in range(100):
+            check = Not(Not(check))
+        check = And(check)
+        self.assertTrue(check(1))
+        self.assertEqual(check._fnc, check._check)
+        self.assertFalse(check(-1))
+
+    def test_or_literals(self):
+        check = Or('/', '/etc', '/home', Ge('/z'))
+        self.assertTrue(check('/etc'))
+        self.assertTrue(check('/zz'))
+        self.assertFalse(check('/usr'))
+        # unhashable values are compared one by one
+        self.assertTrue(Or(b'ab', 1)(bytearray(b'ab')))
+        self.assertFalse(Or(b'ab', 1)(bytearray(b'cd')))
+
+    def test_and_between(self):
+        check = And(Ge(3), Le(7), Not(5))
+        self.assertEqual(2, len(check.args))
+        self.assertIsInstance(check.args[0], Between)
+        self.assertEqual([3, 4, 6, 7], [i for i in range(10) if check(i)])
+
+        # fused also when evaluated by closures
+        check = And(Le(7), Ge(3), lambda x: x != 5)
+        self.assertEqual(2, len(check.args))
+        self.assertEqual(2, len(check.fncs))
+        self.assertIsInstance(check.fncs[0], Between)
+        self.assertEqual([3, 4, 6, 7], [i for i in range(10) if check(i)])
+        self.assertEqual(check._fnc, check._check)
+
+        # bounds guarding an argument between them keep their order
+        tbl = [10, 11, 12, 13, 14]
+        check = And(Le(4), lambda x: tbl[x] > 11, Ge(0))
+        self.assertEqual(3, len(check.args))
+        self.assertEqual([2, 3, 4], [i for i in range(10) if check(i)])
+
+    def test_register_checks(self):
+        register = Register()
+
+        @register('getfile')
+        def no_checks(event, subj, obj):
+            pass
+
+        @register('getfile', event={'filename': '/'}, subject=lambda s: s.uid == 0)
+        def some_checks(event, subj, obj):
+            pass
+
+        plain, filtered = register.hooks['getfile']
+        self.assertIs(no_checks, plain['exec'])
+        self.assertEqual((), plain['checks'])
+        # absent object check is skipped, event is checked first
+        self.assertEqual(['event', 'subject'], [kind for kind, check in filtered['checks']])
+
+        kobjects = {'event': Obj(filename='/'), 'subject': Obj(uid=0), 'object': None}
+        self.assertTrue(check_hook(plain, kobjects))
+        self.assertTrue(check_hook(filtered, kobjects))
+        kobjects['event'] = Obj(filename='/etc')
+        self.assertTrue(check_hook(plain, kobjects))
+        self.assertFalse(check_hook(filtered, kobjects))
+        kobjects['event'] = Obj(filename='/')
+        kobjects['subject'] = Obj(uid=1000)
+        self.assertFalse(check_hook(filtered, kobjects))
+
+
+if __name__ == '__main__':
+    unittest.main()
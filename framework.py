@@ -1,3 +1,6 @@
+__all__ = ['NameSpace', 'Register', 'check_hook', 'compile_cmd',
+           'Xor', 'Not', 'And', 'Or', 'Dividable', 'Ge', 'Gt', 'Le', 'Lt', 'Between']
+
 class NameSpace(object):
     _instance = None
 
@@ -18,103 +21,263 @@ class Register():
     def __call__(self, evname, **kwargs):
         def register_decorator(func):
             hooks = self.hooks.setdefault(evname, [])
+            # checks are compiled once here, not on every decision;
+            # only given ones are kept, in order of evaluation
+            checks = tuple((kind, compile_cmd(kwargs[kind])) for kind in ('event', 'object', 'subject')
+                           if kwargs.get(kind) is not None)
             hooks.append({'exec': func,
-                          'event': kwargs.get('event'),
-                          'object': kwargs.get('object'),
-                          'subject': kwargs.get('subject')})
+                          'checks': checks})
             return func
         return register_decorator
 
-def exec(cmd, obj):
-    # execute function
+def check_hook(hook, kobjects):
+    """True if all checks of registered hook pass on kobjects {'event':, 'object':, 'subject':}"""
+    for kind, check in hook['checks']:
+        if not check(kobjects[kind]):
+            return False
+    return True
+
+def compile_cmd(cmd):
+    """Walk a check once and return a function evaluating it on an object"""
+    # function is already a check
     if callable(cmd):
-        return cmd(obj)
-    #conpare dictionaries
+        return cmd
+    # compare dictionaries
     if isinstance(cmd, dict):
-        #print('compare dictionaries')
-        for k, v in cmd.items():
-            if not exec(v, obj.__getattr__(k)):
-                False
-        return True
-    if isinstance(cmd, list):
-        # compare lists
-        if isinstance(obj, list):
-            if len(cmd) != len(obj):
-               return False
-            for i in range(len(cmd)):
-               if not exec(cmd[i], obj.__getattr__(i)):
-                  return False
+        items = [(k, compile_cmd(v)) for k, v in cmd.items()]
+        def dict_check(obj):
+            for k, fnc in items:
+                if not fnc(getattr(obj, k)):
+                    return False
             return True
-        # this is OR
-        for i in cmd:
-            if exec(i, obj):
+        return dict_check
+    if isinstance(cmd, list):
+        fncs = [compile_cmd(i) for i in cmd]
+        def list_check(obj):
+            # compare lists
+            if isinstance(obj, list):
+                if len(fncs) != len(obj):
+                    return False
+                for i, fnc in enumerate(fncs):
+                    if not fnc(obj[i]):
+                        return False
                 return True
-        return False
+            # this is OR
+            for fnc in fncs:
+                if fnc(obj):
+                    return True
+            return False
+        return list_check
     # and compare
-    return cmd == obj
+    return lambda obj: cmd == obj
+
+def exec(cmd, obj):
+    # one-shot evaluation, checks used repeatedly should be compiled once
+    return compile_cmd(cmd)(obj)
+
+def _is_literal(cmd):
+    """True for hashable values compared by equality"""
+    if callable(cmd) or isinstance(cmd, (dict, list)):
+        return False
+    try:
+        hash(cmd)
+    except TypeError:
+        return False
+    return True
+
+def _contains(lits, obj):
+    try:
+        return obj in lits
+    except TypeError:
+        # unhashable object, e.g. Bitmap, compare one by one
+        for i in lits:
+            if i == obj:
+                return True
+        return False
+
+def _fuse_between(args):
+    """Replace neighbouring Ge(a) and Le(b) arguments of And by single Between(a, b)"""
+    # only neighbours, bounds may guard the arguments evaluated after them
+    fused = []
+    i = 0
+    while i < len(args):
+        pair = args[i:i+2]
+        kinds = [type(j) for j in pair]
+        if kinds == [Ge, Le]:
+            fused.append(Between(pair[0].val, pair[1].val))
+            i += 2
+        elif kinds == [Le, Ge]:
+            fused.append(Between(pair[1].val, pair[0].val))
+            i += 2
+        else:
+            fused.append(args[i])
+            i += 1
+    return tuple(fused)
+
+def _const(val, consts):
+    name = 'c%d' % len(consts)
+    consts[name] = val
+    return name
+
+def _to_expr(cmd, consts):
+    """Python source of check 'cmd' applied on 'obj', None if it can't be expressed"""
+    # only exact built-in types, subclasses may override __call__
+    if type(cmd) in (Xor, Not, And, Or, Dividable, Ge, Gt, Le, Lt, Between, _Contains):
+        return cmd._expr(consts)
+    # functions, dictionaries and lists stay interpreted by compile_cmd
+    if callable(cmd) or isinstance(cmd, (dict, list)):
+        return None
+    return '(%s == obj)' % _const(cmd, consts)
+
+def _join_expr(args, op, empty, consts):
+    exprs = [_to_expr(i, consts) for i in args]
+    if None in exprs:
+        return None
+    if not exprs:
+        return empty
+    return '(' + op.join(exprs) + ')'
+
+def _codegen(cmd):
+    """Compile check 'cmd' into one python function, None if it is not possible"""
+    consts = {}
+    try:
+        expr = _to_expr(cmd, consts)
+        if expr is None:
+            return None
+        return eval(compile('lambda obj: ' + expr, '<check>', 'eval'), consts)
+    except (SyntaxError, RecursionError, MemoryError):
+        # check nested too deep for the parser, closures evaluate it
+        return None
 
 class Xor:
+    __slots__ = ('a', 'b', 'fnc_a', 'fnc_b')
     def __init__(self, a, b):
         self.a = a
         self.b = b
+        self.fnc_a = compile_cmd(a)
+        self.fnc_b = compile_cmd(b)
     def __call__(self, obj):
-        return exec(self.a, obj) ^ exec(self.b, obj)
+        return self.fnc_a(obj) ^ self.fnc_b(obj)
+    def _expr(self, consts):
+        return _join_expr((self.a, self.b), ' ^ ', None, consts)
 
 class Not:
+    __slots__ = ('arg', 'fnc')
     def __init__(self, arg):
         self.arg = arg
+        self.fnc = compile_cmd(arg)
     def __call__(self, val):
-        return not exec(self.arg, val)
+        return not self.fnc(val)
+    def _expr(self, consts):
+        expr = _to_expr(self.arg, consts)
+        if expr is None:
+            return None
+        return '(not %s)' % expr
 
 class And:
+    __slots__ = ('args', 'fncs', '_fnc')
     def __init__(self, *args):
-        self.args = args
+        self.args = _fuse_between(args)
+        self.fncs = [compile_cmd(i) for i in self.args]
+        self._fnc = None
     def __call__(self, obj):
-        for i in self.args:
-            if not exec(i, obj): return False
+        fnc = self._fnc
+        if fnc is None:
+            # generated on first call, nested checks are inlined by the outermost one
+            fnc = self._fnc = _codegen(self) or self._check
+        return fnc(obj)
+    def _check(self, obj):
+        for fnc in self.fncs:
+            if not fnc(obj): return False
         return True
+    def _expr(self, consts):
+        return _join_expr(self.args, ' and ', 'True', consts)
 
 class Or:
+    __slots__ = ('args', 'lits', 'others', 'fncs', '_fnc')
     def __init__(self, *args):
         self.args = args
+        # literal alternatives are tested by one set lookup
+        self.lits = frozenset(i for i in args if _is_literal(i))
+        self.others = [i for i in args if not _is_literal(i)]
+        self.fncs = [compile_cmd(i) for i in self.others]
+        self._fnc = None
     def __call__(self, obj):
-        for i in self.args:
-            if exec(i, obj): return True
+        fnc = self._fnc
+        if fnc is None:
+            # generated on first call, nested checks are inlined by the outermost one
+            fnc = self._fnc = _codegen(self) or self._check
+        return fnc(obj)
+    def _check(self, obj):
+        if self.lits and _contains(self.lits, obj): return True
+        for fnc in self.fncs:
+            if fnc(obj): return True
         return False
+    def _expr(self, consts):
+        args = self.others
+        if self.lits:
+            args = [_Contains(self.lits)] + args
+        return _join_expr(args, ' or ', 'False', consts)
 
 class Dividable:
+    __slots__ = ('val',)
     def __init__(self, val):
         self.val = val
     def __call__(self, val):
         return self.val % val == 0
+    def _expr(self, consts):
+        return '(%s %% obj == 0)' % _const(self.val, consts)
 
 class Ge:
+    __slots__ = ('val',)
     def __init__(self, val):
         self.val = val
     def __call__(self, val):
         return self.val <= val
+    def _expr(self, consts):
+        return '(%s <= obj)' % _const(self.val, consts)
 
 class Gt:
+    __slots__ = ('val',)
     def __init__(self, val):
         self.val = val
     def __call__(self, val):
         return self.val < val
+    def _expr(self, consts):
+        return '(%s < obj)' % _const(self.val, consts)
 
 class Le:
+    __slots__ = ('val',)
     def __init__(self, val):
         self.val = val
     def __call__(self, val):
         return self.val >= val
+    def _expr(self, consts):
+        return '(%s >= obj)' % _const(self.val, consts)
 
 class Lt:
+    __slots__ = ('val',)
     def __init__(self, val):
         self.val = val
     def __call__(self, val):
         return self.val > val
+    def _expr(self, consts):
+        return '(%s > obj)' % _const(self.val, consts)
 
 class Between:
+    __slots__ = ('a', 'b')
     def __init__(self, a, b):
         self.a = a
         self.b = b
     def __call__(self, val):
         return self.a <= val and val <= self.b
+    def _expr(self, consts):
+        return '(%s <= obj and obj <= %s)' % (_const(self.a, consts), _const(self.b, consts))
+
+class _Contains:
+    """Expression part of Or testing its literal alternatives"""
+    __slots__ = ('lits',)
+    def __init__(self, lits):
+        self.lits = lits
+    def _expr(self, consts):
+        return '%s(%s, obj)' % (_const(_contains, consts), _const(self.lits, consts))